@@ -1 +1,5 @@
-from .repogather import main
\ No newline at end of file
+from .repogather import main
+from .pipeline import (FileRecord, gather, gather_text, agather, aiterate, enumerate_files, filter_files,
+                       load_files, normalize_files, tokenize_files, pack_batches, score_batches, select_files,
+                       render_files)
+from .normalizer import Normalizer, NORMALIZATION_LEVELS
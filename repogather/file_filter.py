@@ -1,7 +1,7 @@
 from pathlib import Path
 import re
 import os
-from typing import Iterator, List
+from typing import Iterable, Iterator, List
 import fnmatch
 
 COMMON_IGNORE_PATTERNS = [
@@ -143,23 +143,21 @@ def should_include_file(file_path: Path, include_test: bool, include_config: boo
     return False
 
 
-def filter_code_files(start_dir: Path, include_test: bool = False, include_config: bool = False,
-                      include_ecosystem: bool = False, exclude_patterns: List[str] = None,
-                      include_gitignored: bool = False) -> Iterator[Path]:
+def enumerate_files(repo_root: Path, include_ecosystem: bool = False, exclude_patterns: List[str] = None,
+                    gitignore_patterns: List[str] = None) -> Iterator[Path]:
     if exclude_patterns is None:
         exclude_patterns = []
+    if gitignore_patterns is None:
+        gitignore_patterns = []
 
-    repo_root = find_repo_root(start_dir).absolute()
-    logger.debug(f"Repository root: {repo_root}")
-    gitignore_patterns = parse_gitignore(repo_root) if not include_gitignored else []
-    logger.debug(f"Gitignore patterns: {gitignore_patterns}")
+    repo_root = repo_root.absolute()
 
     def should_process_dir(dir_path: Path) -> bool:
         relative_path = dir_path.relative_to(repo_root)
         logger.debug(f"Checking if directory should be processed: {relative_path}")
         return not is_ignored_path(relative_path, include_ecosystem) and \
                not any(fnmatch.fnmatch(str(relative_path), pattern) for pattern in exclude_patterns) and \
-               (include_gitignored or not is_ignored_by_gitignore(relative_path, gitignore_patterns, repo_root))
+               not is_ignored_by_gitignore(relative_path, gitignore_patterns, repo_root)
 
     def process_directory(dir_path: Path) -> Iterator[Path]:
         logger.debug(f"Processing directory: {dir_path}")
@@ -168,15 +166,44 @@ def filter_code_files(start_dir: Path, include_test: bool = False, include_confi
             logger.debug(f"Checking item: {relative_path}")
 
             if item.is_file():
-                if should_include_file(Path(item.path), include_test, include_config) and \
-                   not any(fnmatch.fnmatch(str(relative_path), pattern) for pattern in exclude_patterns) and \
-                   (include_gitignored or not is_ignored_by_gitignore(relative_path, gitignore_patterns, repo_root)):
-                    logger.debug(f"Yielding file: {relative_path}")
-                    yield relative_path
+                yield relative_path
             elif item.is_dir():
                 if should_process_dir(Path(item.path)):
                     yield from process_directory(Path(item.path))
                 else:
                     logger.debug(f"Skipping directory: {relative_path}")
 
-    yield from process_directory(repo_root)
\ No newline at end of file
+    yield from process_directory(repo_root)
+
+def filter_files(file_paths: Iterable[Path], repo_root: Path, include_test: bool = False,
+                 include_config: bool = False, exclude_patterns: List[str] = None,
+                 gitignore_patterns: List[str] = None) -> Iterator[Path]:
+    if exclude_patterns is None:
+        exclude_patterns = []
+    if gitignore_patterns is None:
+        gitignore_patterns = []
+
+    repo_root = repo_root.absolute()
+
+    for relative_path in file_paths:
+        if should_include_file(repo_root / relative_path, include_test, include_config) and \
+           not any(fnmatch.fnmatch(str(relative_path), pattern) for pattern in exclude_patterns) and \
+           not is_ignored_by_gitignore(relative_path, gitignore_patterns, repo_root):
+            logger.debug(f"Yielding file: {relative_path}")
+            yield relative_path
+
+def filter_code_files(start_dir: Path, include_test: bool = False, include_config: bool = False,
+                      include_ecosystem: bool = False, exclude_patterns: List[str] = None,
+                      include_gitignored: bool = False) -> Iterator[Path]:
+    if exclude_patterns is None:
+        exclude_patterns = []
+
+    repo_root = find_repo_root(start_dir).absolute()
+    logger.debug(f"Repository root: {repo_root}")
+    gitignore_patterns = parse_gitignore(repo_root) if not include_gitignored else []
+    logger.debug(f"Gitignore patterns: {gitignore_patterns}")
+
+    file_paths = enumerate_files(repo_root, include_ecosystem=include_ecosystem,
+                                 exclude_patterns=exclude_patterns, gitignore_patterns=gitignore_patterns)
+    yield from filter_files(file_paths, repo_root, include_test=include_test, include_config=include_config,
+                            exclude_patterns=exclude_patterns, gitignore_patterns=gitignore_patterns)
@@ -4,22 +4,19 @@ from .openai_client import OpenAIClient
 from .token_counter import MODELS, split_contents
 import time
 
-def query_llm(query: str, file_contents: dict, model: str, client: OpenAIClient):
-    max_tokens = MODELS[model]["max_tokens"]
-    batches = split_contents(file_contents, max_tokens)
+RESPONSE_FORMAT = {
+    #"thoughts": str,
+    "relevance_scores": {
 
-    all_relevance_scores = {}
-    all_thoughts = []
-    total_llm_time = 0
-
-    for i, batch in enumerate(batches, 1):
-        batch_contents = {str(path): content for path, content in batch.items()}
+    }
+}
 
-        rendered = ""
-        for path_string, content in batch_contents.items():
-            rendered += f"-- File: {path_string} --\n\n{content}\n\n"
+def build_prompt(query: str, batch_contents: dict) -> str:
+    rendered = ""
+    for path_string, content in batch_contents.items():
+        rendered += f"-- File: {path_string} --\n\n{content}\n\n"
 
-        prompt = f"""
+    return f"""
         Given the following query: "{query}"
 
         Please analyze the relevance of each file to this query. Consider both direct and indirect relevance.
@@ -44,17 +41,42 @@ def query_llm(query: str, file_contents: dict, model: str, client: OpenAIClient)
         {rendered}
         """
 
-        # Before providing the final output, please explicitly think through your thoughts on which files are most relevant and why.
+def score_batch(query: str, batch: dict, model: str, client: OpenAIClient) -> dict:
+    batch_contents = {str(path): content for path, content in batch.items()}
+    prompt = build_prompt(query, batch_contents)
+
+    # Before providing the final output, please explicitly think through your thoughts on which files are most relevant and why.
+
+    response = client.chat(prompt, RESPONSE_FORMAT, model=model)
+    return parse_relevance_scores(response)
 
-        response_format = {
-            #"thoughts": str,
-            "relevance_scores": {
+def parse_relevance_scores(response: dict) -> dict:
+    # For some reason, the response is either:
+    # { "type": "object", "properties": { "relevance_scores": { "<filename>": <relevance_score>, ... } } }
+    # OR
+    # { "relevance_scores": { "<filename>": <relevance_score>, ... } }
 
-            }
-        }
+    if 'properties' in response:
+        relevance_scores = response['properties']['relevance_scores']
+    else:
+        relevance_scores = response['relevance_scores']
+
+    if isinstance(relevance_scores, str):
+        relevance_scores = json.loads(relevance_scores)
+    return relevance_scores
+
+def query_llm(query: str, file_contents: dict, model: str, client: OpenAIClient):
+    max_tokens = MODELS[model]["max_tokens"]
+    batches = split_contents(file_contents, max_tokens)
+
+    all_relevance_scores = {}
+    total_llm_time = 0
+
+    for i, batch in enumerate(batches, 1):
+        prompt = build_prompt(query, {str(path): content for path, content in batch.items()})
 
         start_time = time.time()
-        response = client.chat(prompt, response_format, model=model)
+        response = client.chat(prompt, RESPONSE_FORMAT, model=model)
         end_time = time.time()
         llm_time = end_time - start_time
         total_llm_time += llm_time
@@ -62,26 +84,10 @@ def query_llm(query: str, file_contents: dict, model: str, client: OpenAIClient)
         print(f"LLM call {i} took {llm_time:.2f} seconds")
         print(response)
 
-        #import pdb
-        #pdb.set_trace()
-
-        # For some reason, the response is either:
-        # { "type": "object", "properties": { "relevance_scores": { "<filename>": <relevance_score>, ... } } }
-        # OR
-        # { "relevance_scores": { "<filename>": <relevance_score>, ... } }
-
-        #all_thoughts.append(response['thoughts'])
-
-        if 'properties' in response:
-            all_relevance_scores.update(response['properties']['relevance_scores'])
-        else:
-            all_relevance_scores.update(response['relevance_scores'])
-
-
+        all_relevance_scores.update(parse_relevance_scores(response))
 
     print(f"Total LLM processing time: {total_llm_time:.2f} seconds")
 
     return {
-        #"thoughts": "\n\n".join(all_thoughts),
         "relevance_scores": all_relevance_scores
     }
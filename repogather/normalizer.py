@@ -0,0 +1,241 @@
+import hashlib
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Rules run in the order listed; whitespace goes last so it also collapses the blank lines left by the others
+NORMALIZATION_LEVELS = {
+    'none': (),
+    'light': ('whitespace',),
+    'standard': ('lockfiles', 'headers', 'literals', 'whitespace'),
+    'aggressive': ('lockfiles', 'headers', 'comments', 'literals', 'whitespace'),
+}
+
+HASH_COMMENT_EXTENSIONS = {
+    '.py', '.rb', '.sh', '.bash', '.yml', '.yaml', '.toml', '.cfg', '.conf', '.ini', '.env',
+    '.gitignore', '.dockerignore'
+}
+SLASH_COMMENT_EXTENSIONS = {
+    '.js', '.ts', '.jsx', '.tsx', '.java', '.c', '.cpp', '.cs', '.go', '.php', '.swift', '.kt',
+    '.rs', '.scala', '.scss', '.less'
+}
+DASH_COMMENT_EXTENSIONS = {'.sql'}
+BLOCK_COMMENT_EXTENSIONS = SLASH_COMMENT_EXTENSIONS | {'.css'}
+MARKUP_COMMENT_EXTENSIONS = {'.html', '.xml'}
+# Quoted strings are only elided where every quote delimits a string value
+JSON_EXTENSIONS = {'.json'}
+YAML_EXTENSIONS = {'.yml', '.yaml'}
+PROSE_EXTENSIONS = {'.md', '.txt'}
+
+MIN_HEADER_LINES = 3
+MAX_LITERAL_LENGTH = 200
+MAX_LINE_LENGTH = 1000
+LOCKFILE_INTEGRITY_ENTRIES = 20
+CHARS_PER_TOKEN = 4  # Rough average for English text and code, used to estimate tokens saved
+
+TRAILING_WHITESPACE_RE = re.compile(r'[ \t]+$', re.MULTILINE)
+BLANK_LINES_RE = re.compile(r'\n{3,}')
+HASH_COMMENT_RE = re.compile(r'^[ \t]*#(?!!)[^\n]*\n', re.MULTILINE)
+SLASH_COMMENT_RE = re.compile(r'^[ \t]*//[^\n]*\n', re.MULTILINE)
+DASH_COMMENT_RE = re.compile(r'^[ \t]*--[^\n]*\n', re.MULTILINE)
+JSON_STRING_RE = re.compile(r'"((?:[^"\\\n]|\\.)*)"')
+YAML_DOUBLE_QUOTED_RE = re.compile(r'^([ \t]*(?:-[ \t]+)?(?:[^\s:#"\'][^:#\n]*:[ \t]+)?)"((?:[^"\\\n]|\\.){%d,})"[ \t]*$'
+                                   % MAX_LITERAL_LENGTH, re.MULTILINE)
+YAML_SINGLE_QUOTED_RE = re.compile(r"^([ \t]*(?:-[ \t]+)?(?:[^\s:#\"'][^:#\n]*:[ \t]+)?)'((?:[^'\n]|''){%d,})'[ \t]*$"
+                                   % MAX_LITERAL_LENGTH, re.MULTILINE)
+BASE64_RE = re.compile(r'[A-Za-z0-9+/]{%d,}={0,2}' % MAX_LITERAL_LENGTH)
+LONG_LINE_RE = re.compile(r'^([^\n]{%d})[^\n]+' % MAX_LINE_LENGTH, re.MULTILINE)
+
+
+def _elided(length: int, what: str) -> str:
+    return f"[... {length:,} char {what} elided ...]"
+
+
+def normalize_whitespace(content: str) -> str:
+    content = TRAILING_WHITESPACE_RE.sub('', content)
+    return BLANK_LINES_RE.sub('\n\n', content)
+
+
+def _comment_suffix(file_path: Path) -> str:
+    return file_path.suffix.lower() or file_path.name.lower()
+
+
+def _block_comment_delimiters(suffix: str) -> Optional[Tuple[str, str]]:
+    if suffix in BLOCK_COMMENT_EXTENSIONS:
+        return '/*', '*/'
+    if suffix in MARKUP_COMMENT_EXTENSIONS:
+        return '<!--', '-->'
+    return None
+
+
+def _line_comment_prefix(suffix: str) -> Optional[str]:
+    if suffix in HASH_COMMENT_EXTENSIONS:
+        return '#'
+    if suffix in SLASH_COMMENT_EXTENSIONS:
+        return '//'
+    if suffix in DASH_COMMENT_EXTENSIONS:
+        return '--'
+    return None
+
+
+def _drop_block_comments(content: str, opener: str, closer: str) -> str:
+    # Drops block comments that start a line and are followed by nothing but whitespace on their
+    # closing line. A single forward scan with str.find, so an unclosed opener cannot make it quadratic.
+    pieces = []
+    keep_from = 0
+    pos = 0
+    pos_line_start = 0
+    while True:
+        start = content.find(opener, pos)
+        if start == -1:
+            break
+        newline = content.rfind('\n', pos, start)
+        line_start = newline + 1 if newline != -1 else pos_line_start
+        close = content.find(closer, start + len(opener))
+        if close == -1:
+            break  # No closer after this opener means none after any later one either
+        end = close + len(closer)
+        line_end = content.find('\n', end)
+        if content[line_start:start].strip(' \t') or line_end == -1 or content[end:line_end].strip(' \t'):
+            # Code before or after the comment: keep it and carry on after it, as comments do not nest
+            newline = content.rfind('\n', start, end)
+            pos = end
+            pos_line_start = newline + 1 if newline != -1 else line_start
+            continue
+        pieces.append(content[keep_from:line_start])
+        keep_from = pos = pos_line_start = line_end + 1
+    pieces.append(content[keep_from:])
+    return ''.join(pieces)
+
+
+def drop_comments(content: str, file_path: Path) -> str:
+    suffix = _comment_suffix(file_path)
+    delimiters = _block_comment_delimiters(suffix)
+    if delimiters is not None:
+        content = _drop_block_comments(content, *delimiters)
+    if suffix in HASH_COMMENT_EXTENSIONS:
+        content = HASH_COMMENT_RE.sub('', content)
+    elif suffix in SLASH_COMMENT_EXTENSIONS:
+        content = SLASH_COMMENT_RE.sub('', content)
+    elif suffix in DASH_COMMENT_EXTENSIONS:
+        content = DASH_COMMENT_RE.sub('', content)
+    return content
+
+
+def find_header(content: str, file_path: Path) -> Tuple[int, int]:
+    """Return the (start, end) offsets of the file's leading comment block, using its language's comment syntax.
+
+    A leading shebang line is skipped. Both offsets are 0 if there is no such block,
+    including for prose and for extensions whose comment syntax is unknown.
+    """
+    suffix = _comment_suffix(file_path)
+    if suffix in PROSE_EXTENSIONS:
+        return 0, 0
+
+    start = 0
+    if content.startswith('#!'):
+        start = content.find('\n') + 1
+        if start == 0:
+            return 0, 0
+
+    delimiters = _block_comment_delimiters(suffix)
+    if delimiters is not None and content.startswith(delimiters[0], start):
+        close = content.find(delimiters[1], start)
+        line_end = content.find('\n', close) if close != -1 else -1
+        if line_end != -1 and not content[close + len(delimiters[1]):line_end].strip(' \t'):
+            return start, line_end + 1
+
+    prefix = _line_comment_prefix(suffix)
+    if prefix is None:
+        return 0, 0
+    end = start
+    while content.startswith(prefix, end):
+        line_end = content.find('\n', end)
+        if line_end == -1:
+            break
+        end = line_end + 1
+    return (start, end) if end > start else (0, 0)
+
+
+def _elide_json_string(match) -> str:
+    if len(match.group(1)) < MAX_LITERAL_LENGTH:
+        return match.group(0)
+    return '"' + _elided(len(match.group(1)), 'string') + '"'
+
+
+def elide_literals(content: str, file_path: Path) -> str:
+    suffix = file_path.suffix.lower()
+    if suffix in PROSE_EXTENSIONS:
+        return content
+    if suffix in JSON_EXTENSIONS:
+        content = JSON_STRING_RE.sub(_elide_json_string, content)
+    elif suffix in YAML_EXTENSIONS:
+        content = YAML_DOUBLE_QUOTED_RE.sub(lambda m: m.group(1) + '"' + _elided(len(m.group(2)), 'string') + '"',
+                                            content)
+        content = YAML_SINGLE_QUOTED_RE.sub(lambda m: m.group(1) + "'" + _elided(len(m.group(2)), 'string') + "'",
+                                            content)
+    content = BASE64_RE.sub(lambda m: _elided(len(m.group(0)), 'blob'), content)
+    return LONG_LINE_RE.sub(lambda m: m.group(1) + _elided(len(m.group(0)) - MAX_LINE_LENGTH, 'line tail'), content)
+
+
+def is_lockfile_like(content: str, file_path: Path) -> bool:
+    if file_path.suffix.lower() != '.json':
+        return False
+    return '"lockfileVersion"' in content or content.count('"integrity":') >= LOCKFILE_INTEGRITY_ENTRIES
+
+
+class Normalizer:
+    """Applies a normalization level to file contents and records what each rule saved.
+
+    Normalizers are stateful: a leading comment block (e.g. a license header) is kept
+    the first time it is seen and replaced by a reference to that file afterwards, so
+    use a separate instance for each stream of files. Only characters are counted
+    while normalizing; report() estimates the tokens from them, so no tokenizer runs.
+    """
+
+    def __init__(self, level: str = 'standard'):
+        if level not in NORMALIZATION_LEVELS:
+            raise ValueError(f"Unknown normalization level: {level}")
+        self.level = level
+        self.rules = NORMALIZATION_LEVELS[level]
+        self.chars_saved = {rule: 0 for rule in self.rules}
+        self._seen_headers: Dict[str, Path] = {}
+
+    def normalize(self, content: str, file_path: Path) -> str:
+        for rule in self.rules:
+            normalized = self._apply(rule, content, file_path)
+            # Elision markers can outgrow what they replace in small files
+            if len(normalized) < len(content):
+                self.chars_saved[rule] += len(content) - len(normalized)
+                content = normalized
+        return content
+
+    def report(self) -> List[Tuple[str, int, int]]:
+        """List (rule, chars removed, estimated tokens removed) for each rule of the level."""
+        return [(rule, chars, chars // CHARS_PER_TOKEN) for rule, chars in self.chars_saved.items()]
+
+    def _apply(self, rule: str, content: str, file_path: Path) -> str:
+        if rule == 'whitespace':
+            return normalize_whitespace(content)
+        if rule == 'comments':
+            return drop_comments(content, file_path)
+        if rule == 'literals':
+            return elide_literals(content, file_path)
+        if rule == 'lockfiles':
+            return _elided(len(content), 'lockfile-like JSON') if is_lockfile_like(content, file_path) else content
+        if rule == 'headers':
+            return self._shorten_header(content, file_path)
+        raise ValueError(f"Unknown normalization rule: {rule}")
+
+    def _shorten_header(self, content: str, file_path: Path) -> str:
+        start, end = find_header(content, file_path)
+        header = content[start:end]
+        if header.count('\n') < MIN_HEADER_LINES:
+            return content
+
+        key = hashlib.sha1(header.encode('utf-8')).hexdigest()
+        first_path = self._seen_headers.setdefault(key, file_path)
+        if first_path == file_path:
+            return content
+
+        return f"{content[:start]}[... header elided, same as {first_path} ...]\n{content[end:]}"
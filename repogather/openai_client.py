@@ -9,9 +9,10 @@ class OpenAIClient:
     OPENAI_API_URL = 'https://api.openai.com/v1/chat/completions'
     DEFAULT_TIMEOUT = 300  # 5 minutes
 
-    def __init__(self, api_key: Optional[str] = None, timeout: int = DEFAULT_TIMEOUT):
+    def __init__(self, api_key: Optional[str] = None, timeout: int = DEFAULT_TIMEOUT, echo: bool = True):
         self.api_key = self._get_api_key(api_key)
         self.timeout = timeout
+        self.echo = echo  # Mirror the streamed response and errors to stdout
 
     def _get_api_key(self, provided_key: Optional[str] = None) -> str:
         if provided_key:
@@ -54,13 +55,14 @@ class OpenAIClient:
         response = requests.post(self.OPENAI_API_URL, headers=headers, json=data, timeout=self.timeout, stream=True)
 
         if not response.ok:
-            print(response.text)
+            if self.echo:
+                print(response.text)
             response.raise_for_status()
 
         content = self._process_streaming_response(response)
 
         content = json.loads(content)
-        if 'thoughts' in content:
+        if 'thoughts' in content and self.echo:
             print(content['thoughts'])
 
         return content
@@ -82,14 +84,16 @@ class OpenAIClient:
                             if content:
                                 buffer += content
                                 full_content += content
-                                # Update the console output
-                                sys.stdout.write('\r' + ' ' * 100 + '\r')  # Clear the line
-                                sys.stdout.write(buffer[-100:])  # Print last 100 characters
-                                sys.stdout.flush()
+                                if self.echo:
+                                    # Update the console output
+                                    sys.stdout.write('\r' + ' ' * 100 + '\r')  # Clear the line
+                                    sys.stdout.write(buffer[-100:])  # Print last 100 characters
+                                    sys.stdout.flush()
                     except json.JSONDecodeError:
                         pass  # Ignore non-JSON lines
 
-        print()  # Print a newline at the end
+        if self.echo:
+            print()  # Print a newline at the end
         return full_content
 
     def _hash_to_json_schema(self, hash: Dict[str, Any]) -> Dict[str, Any]:
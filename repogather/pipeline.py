@@ -0,0 +1,235 @@
+"""Programmatic, streaming API for repogather.
+
+Every stage is a generator that consumes the previous stage lazily, so a caller
+can start handling results before the repository walk has finished, and no stage
+runs further ahead than its consumer asks for:
+
+    enumerate_files -> filter_files -> load_files -> normalize_files (scoring)
+        -> tokenize_files -> pack_batches -> score_batches -> select_files
+        -> normalize_files (output) -> render_files
+
+gather() wires the stages together, and agather() exposes the same pipeline as an
+async generator for asyncio services. Nothing in this module prompts, prints or
+touches the clipboard; the CLI in repogather.py does that through gather()'s
+confirm and on_batch hooks.
+"""
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Callable, Iterable, Iterator, List, Optional, Union
+
+import tiktoken
+
+from .file_filter import enumerate_files, filter_files, find_repo_root, parse_gitignore
+from .llm_query import score_batch
+from .normalizer import Normalizer
+from .openai_client import OpenAIClient
+from .token_counter import MODELS, PROMPT_TOKENS
+
+DEFAULT_MODEL = "gpt-4o-mini-2024-07-18"
+
+
+@dataclass
+class FileRecord:
+    path: Path  # Relative to the repository root
+    content: str
+    scoring_content: Optional[str] = None  # What the LLM sees, when normalized differently from content
+    tokens: Optional[int] = None
+    score: Optional[int] = None
+    error: Optional[str] = None  # Set, with empty content, when the file could not be read
+
+    @property
+    def prompt_content(self) -> str:
+        return self.content if self.scoring_content is None else self.scoring_content
+
+
+def load_files(file_paths: Iterable[Path], repo_root: Path) -> Iterator[FileRecord]:
+    for file_path in file_paths:
+        # Read and close before yielding so a paused consumer does not hold the file open
+        try:
+            with open(repo_root / file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                content = f.read()
+        except OSError as e:
+            yield FileRecord(path=file_path, content="", error=f"Error reading file: {e}")
+            continue
+        yield FileRecord(path=file_path, content=content)
+
+
+def normalize_files(records: Iterable[FileRecord], output: Optional[Normalizer] = None,
+                    scoring: Optional[Normalizer] = None) -> Iterator[FileRecord]:
+    """Normalize each record's content for output and, separately, the copy sent to the LLM for scoring."""
+    for record in records:
+        raw_content = record.content
+        if scoring is not None:
+            record.scoring_content = scoring.normalize(raw_content, record.path)
+        if output is not None:
+            record.content = output.normalize(raw_content, record.path)
+        yield record
+
+
+def tokenize_files(records: Iterable[FileRecord]) -> Iterator[FileRecord]:
+    encoder = tiktoken.encoding_for_model("gpt-4-0125-preview")
+    for record in records:
+        record.tokens = len(encoder.encode(record.prompt_content))
+        yield record
+
+
+def pack_batches(records: Iterable[FileRecord], max_tokens: int) -> Iterator[List[FileRecord]]:
+    """Group tokenized records into batches that fit in one LLM request, yielding each as soon as it is full."""
+    encoder = tiktoken.encoding_for_model("gpt-4-0125-preview")
+    current_batch = []
+    current_tokens = 0
+
+    for record in records:
+        tokens = record.tokens + len(encoder.encode(f"-- File: {record.path} --\n\n\n\n"))
+        if current_batch and current_tokens + tokens > (max_tokens - PROMPT_TOKENS):
+            yield current_batch
+            current_batch = []
+            current_tokens = 0
+
+        current_batch.append(record)
+        current_tokens += tokens
+
+    if current_batch:
+        yield current_batch
+
+
+def score_batches(batches: Iterable[List[FileRecord]], query: str, model: str, client: OpenAIClient,
+                  on_batch: Optional[Callable[[List[FileRecord], float], None]] = None) -> Iterator[FileRecord]:
+    """Ask the LLM to score each batch, yielding its records (score 0 if unmentioned) once the batch is scored.
+
+    on_batch, if given, is called with each scored batch and the seconds its LLM call took.
+    """
+    for batch in batches:
+        start_time = time.time()
+        relevance_scores = score_batch(query, {record.path: record.prompt_content for record in batch}, model, client)
+        llm_time = time.time() - start_time
+        for record in batch:
+            record.score = relevance_scores.get(str(record.path), 0)
+        if on_batch is not None:
+            on_batch(batch, llm_time)
+        for record in batch:
+            record.score = relevance_scores.get(str(record.path), 0)
+            yield record
+
+
+def select_files(records: Iterable[FileRecord], relevance_threshold: int) -> Iterator[FileRecord]:
+    for record in records:
+        if record.score is not None and record.score >= relevance_threshold:
+            yield record
+
+
+def render_files(records: Iterable[FileRecord]) -> Iterator[str]:
+    for record in records:
+        yield f"\n\n--- {record.path} ---\n{record.content if record.error is None else record.error}"
+
+
+def gather(start_dir: Path, query: Optional[str] = None, include_test: bool = False,
+           include_config: bool = False, include_ecosystem: bool = False, exclude_patterns: List[str] = None,
+           include_gitignored: bool = False, relevance_threshold: int = 50, model: str = DEFAULT_MODEL,
+           client: Optional[OpenAIClient] = None, scoring_normalization: Union[str, Normalizer] = 'standard',
+           output_normalization: Union[str, Normalizer] = 'none',
+           confirm: Optional[Callable[[List[FileRecord]], bool]] = None,
+           on_batch: Optional[Callable[[List[FileRecord], float], None]] = None) -> Iterator[FileRecord]:
+    """Stream the files in the repository containing start_dir that are relevant to query.
+
+    Without a query every filtered file is yielded, unscored, and no LLM is used.
+    With a query, files are scored in batches by the LLM and only those at or above
+    relevance_threshold are yielded. If client is not given, one is created from the
+    environment with console echo disabled.
+
+    The normalization arguments take a level name from NORMALIZATION_LEVELS, or a
+    Normalizer instance when the caller wants its per-rule report afterwards. Output
+    normalization only sees the files that are yielded.
+
+    confirm, if given, is called once with every tokenized record before anything is
+    sent to the LLM (so enumeration finishes first); if it returns False nothing is
+    yielded. on_batch is passed on to score_batches().
+
+    Arguments are validated here, before the returned generator is first advanced.
+    """
+    if model not in MODELS:
+        raise ValueError(f"Unknown model: {model}")
+    if isinstance(scoring_normalization, str):
+        scoring_normalization = Normalizer(scoring_normalization)
+    if isinstance(output_normalization, str):
+        output_normalization = Normalizer(output_normalization)
+    if query is not None and client is None:
+        client = OpenAIClient(echo=False)
+
+    repo_root = find_repo_root(Path(start_dir)).absolute()
+    return _gather(repo_root, query, include_test, include_config, include_ecosystem, exclude_patterns,
+                   include_gitignored, relevance_threshold, model, client, scoring_normalization,
+                   output_normalization, confirm, on_batch)
+
+
+def _gather(repo_root: Path, query: Optional[str], include_test: bool, include_config: bool,
+            include_ecosystem: bool, exclude_patterns: Optional[List[str]], include_gitignored: bool,
+            relevance_threshold: int, model: str, client: Optional[OpenAIClient], scoring_normalization: Normalizer,
+            output_normalization: Normalizer, confirm: Optional[Callable[[List[FileRecord]], bool]],
+            on_batch: Optional[Callable[[List[FileRecord], float], None]]) -> Iterator[FileRecord]:
+    gitignore_patterns = parse_gitignore(repo_root) if not include_gitignored else []
+
+    file_paths = enumerate_files(repo_root, include_ecosystem=include_ecosystem,
+                                 exclude_patterns=exclude_patterns, gitignore_patterns=gitignore_patterns)
+    file_paths = filter_files(file_paths, repo_root, include_test=include_test, include_config=include_config,
+                              exclude_patterns=exclude_patterns, gitignore_patterns=gitignore_patterns)
+    records = load_files(file_paths, repo_root)
+
+    if query is None:
+        yield from normalize_files(records, output=output_normalization)
+        return
+
+    # Output normalization waits until after selection, so a header is only elided in
+    # favour of a file that is itself in the output
+    records = tokenize_files(normalize_files(records, scoring=scoring_normalization))
+    if confirm is not None:
+        records = list(records)
+        if not confirm(records):
+            return
+
+    batches = pack_batches(records, MODELS[model]["max_tokens"])
+    selected = select_files(score_batches(batches, query, model, client, on_batch), relevance_threshold)
+    yield from normalize_files(selected, output=output_normalization)
+
+
+def gather_text(*args, **kwargs) -> str:
+    """Run gather() and return the selected files rendered as one string, as the CLI copies to the clipboard."""
+    return "".join(render_files(gather(*args, **kwargs))).strip()
+
+
+async def aiterate(iterator: Iterator) -> AsyncIterator:
+    """Drive a blocking iterator from a worker thread, one item at a time, without blocking the event loop.
+
+    If the consumer stops early the iterator is closed, on the same single worker thread
+    so that it runs only after any next() still in flight there has returned.
+    """
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=1)
+    sentinel = object()
+    try:
+        while True:
+            item = await loop.run_in_executor(executor, next, iterator, sentinel)
+            if item is sentinel:
+                return
+            yield item
+    finally:
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            executor.submit(close)
+        executor.shutdown(wait=False)
+
+
+async def agather(*args, **kwargs) -> AsyncIterator[FileRecord]:
+    """Async counterpart of gather(), taking the same arguments.
+
+    gather()'s setup (finding the repository root, creating the client) also runs in a
+    worker thread, so argument errors surface on the first iteration.
+    """
+    loop = asyncio.get_running_loop()
+    records = await loop.run_in_executor(None, functools.partial(gather, *args, **kwargs))
+    async for record in aiterate(records):
+        yield record
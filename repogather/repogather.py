@@ -1,14 +1,12 @@
 import argparse
-import os
 import sys
 from pathlib import Path
 import pyperclip
 import tiktoken
 
-from .file_filter import filter_code_files, parse_gitignore, is_ignored_by_gitignore, find_repo_root
-from .token_counter import count_tokens, calculate_cost, MODELS, format_tokens, analyze_tokens
-from .llm_query import query_llm
-from .output_processor import process_output
+from .token_counter import calculate_cost, MODELS, format_tokens, analyze_tokens, directory_tokens
+from .pipeline import DEFAULT_MODEL, gather, render_files
+from .normalizer import NORMALIZATION_LEVELS, Normalizer
 from .openai_client import OpenAIClient
 
 def get_user_confirmation(total_tokens, cost, num_files, model, large_files, large_dirs):
@@ -39,6 +37,14 @@ def count_clipboard_tokens(text):
     encoder = tiktoken.encoding_for_model("gpt-4-0125-preview")
     return len(encoder.encode(text))
 
+def print_normalization_report(label, normalizer):
+    if not normalizer.rules:
+        return
+
+    print(f"\n{label} normalization ({normalizer.level}):")
+    for rule, chars, tokens in normalizer.report():
+        print(f"  {rule}: ~{format_tokens(tokens)} tokens ({format_tokens(chars)} chars) removed")
+
 def main():
     parser = argparse.ArgumentParser(description="Gather and analyze repository files based on relevance to a query.")
     parser.add_argument("query", nargs='?', default=None, help="Natural language query to filter files")
@@ -48,44 +54,30 @@ def main():
     parser.add_argument("--include-gitignored", action="store_true", help="Include files that are gitignored")
     parser.add_argument("--exclude", action="append", default=[], help="Exclude files containing the specified path fragment")
     parser.add_argument("--relevance-threshold", type=int, default=50, help="Relevance threshold (0-100)")
-    parser.add_argument("--model", default="gpt-4o-mini-2024-07-18", choices=MODELS.keys(), help="LLM model to use")
+    parser.add_argument("--model", default=DEFAULT_MODEL, choices=MODELS.keys(), help="LLM model to use")
     parser.add_argument("--openai-key", help="OpenAI API key")
     parser.add_argument("--all", action="store_true", help="Return all files without using LLM")
+    parser.add_argument("--score-normalization", default="standard", choices=NORMALIZATION_LEVELS.keys(),
+                        help="Normalization level for file contents sent to the LLM for scoring")
+    parser.add_argument("--output-normalization", default="none", choices=NORMALIZATION_LEVELS.keys(),
+                        help="Normalization level for file contents copied to the clipboard")
     args = parser.parse_args()
 
-    # Get the repository root directory
-    try:
-        repo_root = find_repo_root(Path.cwd())
-    except ValueError:
-        print("Error: Not a git repository (or any of the parent directories)")
-        sys.exit(1)
-
-    # Filter code files
-    code_files = list(filter_code_files(repo_root,
-                                            include_test=args.include_test,
-                                            include_config=args.include_config,
-                                            include_ecosystem=args.include_ecosystem,
-                                            exclude_patterns=args.exclude,
-                                            include_gitignored=args.include_gitignored))
-
-    # If --include-gitignored is not set, filter out gitignored files
-    #if not args.include_gitignored:
-    #    gitignore_patterns = parse_gitignore(repo_root)
-    #    code_files = [f for f in code_files if not is_ignored_by_gitignore(f, gitignore_patterns)]
+    scoring_normalizer = Normalizer(args.score_normalization)
+    output_normalizer = Normalizer(args.output_normalization)
+    gather_options = dict(include_test=args.include_test,
+                          include_config=args.include_config,
+                          include_ecosystem=args.include_ecosystem,
+                          exclude_patterns=args.exclude,
+                          include_gitignored=args.include_gitignored,
+                          output_normalization=output_normalizer)
 
     if args.all:
-        output_string = ""
-        for file_path in code_files:
-            full_path = repo_root / file_path
-            output_string += f"\n\n--- {file_path} ---\n"
-            try:
-                with open(full_path, 'r', encoding='utf-8') as f:
-                    output_string += f.read()
-            except Exception as e:
-                output_string += f"Error reading file: {e}\n"
+        output_string = "".join(render_files(gather(Path.cwd(), **gather_options)))
 
         print("\nAll Files:")
         print(output_string)
+        print_normalization_report("Output", output_normalizer)
 
         try:
             pyperclip.copy(output_string)
@@ -100,26 +92,47 @@ def main():
         print("Error: You must provide a query when not using the --all option.")
         sys.exit(1)
 
-    # Count tokens and calculate cost
-    total_tokens, file_contents, file_tokens, dir_tokens = count_tokens(repo_root, code_files)
-    cost = calculate_cost(total_tokens, args.model)
+    def confirm(records):
+        # Count tokens, calculate cost and analyze token distribution
+        file_tokens = {record.path: record.tokens for record in records}
+        total_tokens = sum(file_tokens.values())
+        cost = calculate_cost(total_tokens, args.model)
+        large_files, large_dirs = analyze_tokens(file_tokens, directory_tokens(file_tokens))
+
+        print_normalization_report("Scoring", scoring_normalizer)
+
+        if not get_user_confirmation(total_tokens, cost, len(records), args.model, large_files, large_dirs):
+            print("Operation cancelled by user.")
+            sys.exit(0)
+        return True
 
-    # Analyze token distribution
-    large_files, large_dirs = analyze_tokens(file_tokens, dir_tokens)
+    scored = []
+    llm_times = []
 
-    # Get user confirmation
-    if not get_user_confirmation(total_tokens, cost, len(code_files), args.model, large_files, large_dirs):
-        print("Operation cancelled by user.")
-        sys.exit(0)
+    def on_batch(batch, llm_time):
+        scored.extend(batch)
+        llm_times.append(llm_time)
+        print(f"LLM call {len(llm_times)} took {llm_time:.2f} seconds")
 
-    # Initialize OpenAIClient
-    client = OpenAIClient(api_key=args.openai_key)
+    relevant = list(gather(Path.cwd(), args.query, relevance_threshold=args.relevance_threshold, model=args.model,
+                           client=OpenAIClient(api_key=args.openai_key), scoring_normalization=scoring_normalizer,
+                           confirm=confirm, on_batch=on_batch, **gather_options))
 
-    # Query LLM
-    response = query_llm(args.query, file_contents, args.model, client)
+    print(f"Total LLM processing time: {sum(llm_times):.2f} seconds")
 
     # Process output
-    relevant_files, output_string = process_output(response, args.relevance_threshold, repo_root)
+    print("\nRelevance Scores:")
+    for record in scored:
+        if record.score:
+            print(f"{record.path}: {record.score}")
+
+    print("\nRelevant Files and Contents:")
+    output_string = ""
+    for rendered in render_files(relevant):
+        print(rendered)
+        output_string += rendered
+    output_string = output_string.strip()
+    print_normalization_report("Output", output_normalizer)
 
     # Copy relevant file paths and contents to clipboard
     try:
@@ -131,8 +144,8 @@ def main():
 
     # Print summary of relevant files
     print("\nSummary of relevant files:")
-    for file in relevant_files:
-        print(file)
+    for record in relevant:
+        print(record.path)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
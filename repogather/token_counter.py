@@ -1,4 +1,3 @@
-import tiktoken
 from pathlib import Path
 from collections import defaultdict
 
@@ -13,28 +12,24 @@ MODELS = {
 }
 
 def count_tokens(root_dir: Path, file_paths):
-    encoder = tiktoken.encoding_for_model("gpt-4-0125-preview")
-    total_tokens = 0
-    file_contents = {}
-    file_tokens = {}
-    dir_tokens = defaultdict(int)
+    from .pipeline import load_files, tokenize_files
+
+    records = list(tokenize_files(load_files(file_paths, root_dir)))
+    file_contents = {record.path: record.content for record in records}
+    file_tokens = {record.path: record.tokens for record in records}
 
-    for file_path in file_paths:
-        full_path = root_dir / file_path
-        with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-            tokens = len(encoder.encode(content))
-            total_tokens += tokens
-            file_contents[file_path] = content
-            file_tokens[file_path] = tokens
+    return sum(file_tokens.values()), file_contents, file_tokens, directory_tokens(file_tokens)
 
-            # Update directory token counts
-            current_dir = file_path.parent
-            while current_dir != Path():
-                dir_tokens[current_dir] += tokens
-                current_dir = current_dir.parent
+def directory_tokens(file_tokens):
+    dir_tokens = defaultdict(int)
+
+    for file_path, tokens in file_tokens.items():
+        current_dir = file_path.parent
+        while current_dir != Path():
+            dir_tokens[current_dir] += tokens
+            current_dir = current_dir.parent
 
-    return total_tokens, file_contents, file_tokens, dir_tokens
+    return dir_tokens
 
 def calculate_cost(total_tokens, model):
     if model not in MODELS:
@@ -62,28 +57,7 @@ def analyze_tokens(file_tokens, dir_tokens):
     return large_files, large_dirs
 
 def split_contents(file_contents, max_tokens):
-    batches = []
-    current_batch = {}
-    current_tokens = 0
-
-    encoder = tiktoken.encoding_for_model("gpt-4-0125-preview")
-
-    for file_path, content in file_contents.items():
-        tokens = len(encoder.encode(f"-- File: {file_path} --\n\n{content}\n\n"))
-        if current_tokens + tokens > (max_tokens - PROMPT_TOKENS):
-            batches.append(current_batch)
-            current_batch = {}
-            current_tokens = 0
-
-        current_batch[file_path] = content
-        current_tokens += tokens
-
-        if current_tokens >= max_tokens:
-            batches.append(current_batch)
-            current_batch = {}
-            current_tokens = 0
-
-    if current_batch:
-        batches.append(current_batch)
+    from .pipeline import FileRecord, pack_batches, tokenize_files
 
-    return batches
\ No newline at end of file
+    records = tokenize_files(FileRecord(path=file_path, content=content) for file_path, content in file_contents.items())
+    return [{record.path: record.content for record in batch} for batch in pack_batches(records, max_tokens)]
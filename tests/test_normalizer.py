@@ -0,0 +1,170 @@
+import time
+from pathlib import Path
+
+import pytest
+
+from repogather.normalizer import (MAX_LINE_LENGTH, Normalizer, drop_comments, elide_literals, find_header,
+                                   normalize_whitespace)
+
+LICENSE = "# Copyright (c) Example\n# Licensed under the MIT License.\n# See LICENSE for details.\n"
+BLOCK_LICENSE = "/*\n * Copyright (c) Example\n * Licensed under the MIT License.\n */\n"
+
+
+def test_whitespace_strips_trailing_and_collapses_blank_runs():
+    assert normalize_whitespace("a = 1   \n\n\n\n\nb = 2\t\n") == "a = 1\n\nb = 2\n"
+
+
+def test_whitespace_keeps_single_blank_lines():
+    content = "a = 1\n\nb = 2\n"
+    assert normalize_whitespace(content) == content
+
+
+def test_comments_drops_whole_line_comments_per_language():
+    assert drop_comments("# note\nx = 1  # keep\n", Path("a.py")) == "x = 1  # keep\n"
+    assert drop_comments("// note\nlet x = 1; // keep\n", Path("a.js")) == "let x = 1; // keep\n"
+    assert drop_comments("-- note\nSELECT 1;\n", Path("a.sql")) == "SELECT 1;\n"
+
+
+def test_comments_keeps_shebang():
+    assert drop_comments("#!/usr/bin/env python\n# note\nx = 1\n", Path("a.py")) == "#!/usr/bin/env python\nx = 1\n"
+
+
+def test_comments_drops_standalone_block_comment():
+    assert drop_comments("/* one\n * two\n */\nint x;\n", Path("a.c")) == "int x;\n"
+
+
+def test_comments_keeps_code_after_inline_block_comment():
+    content = "/* a */ int x = 1;\nint y = 2;\nfoo();\n/* b */\nint z;\n"
+    assert drop_comments(content, Path("a.c")) == "/* a */ int x = 1;\nint y = 2;\nfoo();\nint z;\n"
+
+
+def test_comments_keeps_markup_after_inline_comment():
+    content = "<!-- a --> <p>x</p>\n<p>y</p>\n<!-- b -->\n<p>z</p>\n"
+    assert drop_comments(content, Path("a.html")) == "<!-- a --> <p>x</p>\n<p>y</p>\n<p>z</p>\n"
+
+
+def test_comments_keeps_unclosed_block_comment():
+    content = "/* never closed\nint x;\n"
+    assert drop_comments(content, Path("a.c")) == content
+
+
+def test_comments_are_linear_on_unclosed_openers():
+    html = "<!-- open\n<p>x</p>\n" * 50000
+    c_code = "int a; /* open\n" * 50000 + "*/\n"
+    start = time.perf_counter()
+    assert drop_comments(html, Path("a.html")) == html
+    assert drop_comments(c_code, Path("a.c")) == c_code
+    assert time.perf_counter() - start < 1.0
+
+
+def test_comments_leaves_unknown_languages_alone():
+    content = "# Heading\n"
+    assert drop_comments(content, Path("README.md")) == content
+
+
+def test_literals_leave_prose_with_apostrophes_alone():
+    content = "This doesn't " + "change anything " * 20 + "but it's important.\n"
+    assert elide_literals(content, Path("README.md")) == content
+
+
+def test_literals_leave_code_between_short_strings_alone():
+    content = 'x = f("a") + ' + "g(b, c) + " * 30 + 'h("d")\n'
+    assert elide_literals(content, Path("a.py")) == content
+
+
+def test_literals_elide_long_json_strings_only():
+    long_value = "v" * 300
+    content = '{"short": "keep", "long": "' + long_value + '"}'
+    assert elide_literals(content, Path("data.json")) == \
+        '{"short": "keep", "long": "[... 300 char string elided ...]"}'
+
+
+def test_literals_elide_long_yaml_quoted_values():
+    content = 'name: "' + "v " * 150 + '"\nother: keep\n'
+    assert elide_literals(content, Path("a.yml")) == 'name: "[... 300 char string elided ...]"\nother: keep\n'
+
+
+def test_literals_elide_base64_blobs():
+    assert elide_literals("DATA = '" + "QUJD" * 100 + "'\n", Path("a.py")) == \
+        "DATA = '[... 400 char blob elided ...]'\n"
+
+
+def test_literals_shorten_long_lines_in_code_but_not_prose():
+    line = "x, " * MAX_LINE_LENGTH + "\n"
+    assert elide_literals(line, Path("a.js")).startswith(line[:MAX_LINE_LENGTH] + "[... ")
+    assert elide_literals(line, Path("notes.txt")) == line
+
+
+def test_lockfiles_elided():
+    content = '{\n  "lockfileVersion": 3,\n  "packages": {' + '"x": {"version": "1.0.0"}, ' * 20 + '}\n}\n'
+    normalized = Normalizer('standard').normalize(content, Path("package-lock.json"))
+    assert normalized == f"[... {len(content):,} char lockfile-like JSON elided ...]"
+
+
+def test_rules_never_grow_content():
+    content = '{"lockfileVersion": 3}'
+    assert Normalizer('standard').normalize(content, Path("x.json")) == content
+
+
+def test_headers_repeated_across_files_are_shortened():
+    normalizer = Normalizer('standard')
+    assert normalizer.normalize(LICENSE + "a = 1\n", Path("a.py")) == LICENSE + "a = 1\n"
+    assert normalizer.normalize(LICENSE + "b = 2\n", Path("b.py")) == \
+        "[... header elided, same as a.py ...]\nb = 2\n"
+
+
+def test_headers_use_block_comments_per_language():
+    normalizer = Normalizer('standard')
+    normalizer.normalize(BLOCK_LICENSE + "int a;\n", Path("a.c"))
+    assert normalizer.normalize(BLOCK_LICENSE + "int b;\n", Path("b.c")) == \
+        "[... header elided, same as a.c ...]\nint b;\n"
+
+
+def test_headers_keep_shebang():
+    normalizer = Normalizer('standard')
+    normalizer.normalize("#!/bin/sh\n" + LICENSE + "a\n", Path("a.sh"))
+    assert normalizer.normalize("#!/bin/sh\n" + LICENSE + "b\n", Path("b.sh")) == \
+        "#!/bin/sh\n[... header elided, same as a.sh ...]\nb\n"
+
+
+def test_headers_ignore_markdown_headings_and_lists():
+    normalizer = Normalizer('standard')
+    for content in ("# Project\n## Install\n### Usage notes for everyone here\nbody\n",
+                    "- first item in the list\n- second item in the list\n- third item in the list\nbody\n"):
+        assert normalizer.normalize(content, Path("a.md")) == content
+        assert normalizer.normalize(content, Path("b.md")) == content
+
+
+def test_headers_ignore_other_languages_comment_syntax():
+    assert find_header("-- Copyright\n-- MIT\n-- See LICENSE\nx\n", Path("a.py")) == (0, 0)
+    assert find_header(LICENSE + "x\n", Path("a.js")) == (0, 0)
+    assert find_header(LICENSE + "x\n", Path("notes.unknown")) == (0, 0)
+    assert find_header(LICENSE + "x\n", Path("a.py")) == (0, len(LICENSE))
+
+
+def test_headers_short_comment_blocks_are_kept():
+    normalizer = Normalizer('standard')
+    content = "# one\n# two\nx = 1\n"
+    normalizer.normalize(content, Path("a.py"))
+    assert normalizer.normalize(content, Path("b.py")) == content
+
+
+def test_light_level_only_touches_whitespace():
+    normalizer = Normalizer('light')
+    content = LICENSE + "x = 1   \n"
+    normalizer.normalize(content, Path("a.py"))
+    assert normalizer.normalize(content, Path("b.py")) == LICENSE + "x = 1\n"
+
+
+def test_report_counts_chars_and_estimates_tokens_per_rule():
+    normalizer = Normalizer('aggressive')
+    normalizer.normalize("# note\nx = 1" + " " * 40 + "\n", Path("a.py"))
+    report = {rule: (chars, tokens) for rule, chars, tokens in normalizer.report()}
+    assert report['comments'] == (7, 1)
+    assert report['whitespace'] == (40, 10)
+    assert report['literals'] == (0, 0)
+
+
+def test_unknown_level_raises():
+    with pytest.raises(ValueError):
+        Normalizer('extreme')
@@ -0,0 +1,196 @@
+import asyncio
+import threading
+from pathlib import Path
+
+import pytest
+
+from repogather import pipeline
+from repogather.file_filter import filter_code_files
+from repogather.pipeline import (FileRecord, agather, gather, gather_text, load_files, pack_batches, render_files,
+                                 score_batches, select_files)
+from repogather.token_counter import PROMPT_TOKENS
+
+
+class WhitespaceEncoder:
+    def encode(self, text):
+        return text.split()
+
+
+class FakeClient:
+    def __init__(self, scores):
+        self.scores = scores
+        self.prompts = []
+
+    def chat(self, prompt, response_format, model):
+        self.prompts.append(prompt)
+        return {"relevance_scores": self.scores}
+
+
+@pytest.fixture(autouse=True)
+def whitespace_encoder(monkeypatch):
+    # tiktoken downloads its encodings on first use; keep these tests offline
+    monkeypatch.setattr(pipeline.tiktoken, "encoding_for_model", lambda model: WhitespaceEncoder())
+
+
+@pytest.fixture
+def repo(tmp_path):
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".gitignore").write_text("secret.py\nlogs\n")
+    files = {
+        "main.py": "import app\n",
+        "README.md": "# Demo\n",
+        "app/util.py": "def helper(): pass\n",
+        "app/test_util.py": "def test_helper(): pass\n",
+        "config.yaml": "debug: true\n",
+        "node_modules/lib/index.js": "module.exports = 1\n",
+        "logs/run.py": "print('log')\n",
+        "secret.py": "KEY = 1\n",
+        "legacy/old.py": "x = 1\n",
+        "data.bin": "\x00\x01",
+    }
+    for name, content in files.items():
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    return tmp_path
+
+
+def records_with_tokens(*tokens):
+    return [FileRecord(path=Path(name), content="", tokens=count) for name, count in zip("abcdefgh", tokens)]
+
+
+def test_filter_code_files_matches_behaviour_before_split(repo):
+    assert sorted(map(str, filter_code_files(repo, exclude_patterns=["legacy"]))) == \
+        ["README.md", "app/util.py", "main.py"]
+    assert sorted(map(str, filter_code_files(repo, include_test=True, include_config=True, include_ecosystem=True,
+                                             include_gitignored=True))) == \
+        ["README.md", "app/test_util.py", "app/util.py", "config.yaml", "legacy/old.py", "logs/run.py", "main.py",
+         "node_modules/lib/index.js", "secret.py"]
+
+
+def test_gather_streams_before_enumeration_finishes(repo, monkeypatch):
+    enumerated = []
+    real_enumerate_files = pipeline.enumerate_files
+
+    def spy(*args, **kwargs):
+        for path in real_enumerate_files(*args, **kwargs):
+            enumerated.append(path)
+            yield path
+
+    monkeypatch.setattr(pipeline, "enumerate_files", spy)
+    records = gather(repo, include_test=True, include_config=True, include_ecosystem=True, include_gitignored=True)
+    assert enumerated == []
+
+    first = next(records)
+    assert first.path in enumerated
+    assert len(enumerated) < 10
+    records.close()
+
+
+def test_pack_batches_respects_the_limit():
+    # Each record costs its tokens plus 4 for the "-- File: x --" header
+    records = records_with_tokens(3, 3, 3, 50, 3)
+    batches = list(pack_batches(records, PROMPT_TOKENS + 20))
+    assert [[str(record.path) for record in batch] for batch in batches] == [["a", "b"], ["c"], ["d"], ["e"]]
+
+
+def test_pack_batches_yields_each_batch_once_full():
+    def records():
+        yield from records_with_tokens(10, 10)
+        raise AssertionError("pack_batches read past the first full batch")
+
+    assert [str(record.path) for record in next(pack_batches(records(), PROMPT_TOKENS + 20))] == ["a"]
+
+
+def test_unmentioned_files_score_zero_and_are_filtered():
+    client = FakeClient({"a": 80, "b": 30})
+    scored = list(score_batches([records_with_tokens(1, 1, 1)], "query", "gpt-4o-mini", client))
+    assert [(str(record.path), record.score) for record in scored] == [("a", 80), ("b", 30), ("c", 0)]
+    assert [str(record.path) for record in select_files(scored, 50)] == ["a"]
+
+
+def test_score_batches_reports_each_batch():
+    seen = []
+    client = FakeClient({})
+    batches = [records_with_tokens(1), records_with_tokens(1, 1)]
+    list(score_batches(batches, "query", "gpt-4o-mini", client,
+                       on_batch=lambda batch, seconds: seen.append(len(batch))))
+    assert seen == [1, 2]
+
+
+def test_gather_scores_and_selects(repo):
+    client = FakeClient({"main.py": 90, "app/util.py": 10})
+    records = list(gather(repo, "query", client=client, relevance_threshold=50))
+    assert [(str(record.path), record.score) for record in records] == [("main.py", 90)]
+    assert "def helper(): pass" in client.prompts[0]
+
+
+def test_gather_confirm_can_cancel(repo):
+    client = FakeClient({"main.py": 90})
+    confirmed = []
+
+    def confirm(records):
+        confirmed.extend(records)
+        return False
+
+    assert list(gather(repo, "query", client=client, exclude_patterns=["legacy"], confirm=confirm)) == []
+    assert sorted(str(record.path) for record in confirmed) == ["README.md", "app/util.py", "main.py"]
+    assert all(record.tokens is not None for record in confirmed)
+    assert client.prompts == []
+
+
+def test_gather_text_renders_all_files_without_query(repo):
+    text = gather_text(repo, exclude_patterns=["legacy"])
+    assert text.startswith("--- ")
+    assert "--- main.py ---\nimport app\n" in text
+
+
+def test_unreadable_files_yield_error_records(tmp_path):
+    (tmp_path / "ok.py").write_text("x = 1\n")
+    records = list(load_files([Path("ok.py"), Path("missing.py")], tmp_path))
+    assert records[0].error is None and records[0].content == "x = 1\n"
+    assert records[1].content == "" and records[1].error.startswith("Error reading file:")
+    assert list(render_files(records))[1] == f"\n\n--- missing.py ---\n{records[1].error}"
+
+
+@pytest.mark.parametrize("kwargs", [{"model": "not-a-model"}, {"scoring_normalization": "extreme"},
+                                    {"output_normalization": "extreme"}])
+def test_gather_validates_arguments_before_iteration(repo, kwargs):
+    with pytest.raises(ValueError):
+        gather(repo, "query", client=FakeClient({}), **kwargs)
+
+
+def test_agather_yields_records(repo):
+    async def collect():
+        return [str(record.path) async for record in agather(repo, exclude_patterns=["legacy"])]
+
+    assert sorted(asyncio.run(collect())) == ["README.md", "app/util.py", "main.py"]
+
+
+def test_agather_sets_up_off_the_loop_and_closes_generator_when_consumer_breaks(repo, monkeypatch):
+    closed = threading.Event()
+    setup_threads = []
+    generators = []  # Held so that only an explicit close(), not garbage collection, can finish the generator
+
+    def records():
+        try:
+            for i in range(100):
+                yield FileRecord(path=Path(f"{i}.py"), content="")
+        finally:
+            closed.set()
+
+    def fake_gather(*args, **kwargs):
+        setup_threads.append(threading.current_thread())
+        generators.append(records())
+        return generators[-1]
+
+    monkeypatch.setattr(pipeline, "gather", fake_gather)
+
+    async def consume():
+        async for record in agather(repo):
+            if record.path == Path("2.py"):
+                break
+
+    asyncio.run(consume())
+    assert setup_threads and setup_threads[0] is not threading.main_thread()
+    assert closed.wait(timeout=5)